@@ -4,21 +4,32 @@ Scales features and performs KMeans clustering.
 """
 
 import pandas as pd
+import numbers
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from typing import Tuple
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 
 
-def prepare_features_for_clustering(features_df: pd.DataFrame) -> Tuple[pd.DataFrame, StandardScaler]:
+# Above this many users, switch to MiniBatchKMeans
+MINIBATCH_THRESHOLD = 10_000
+
+# Number of recent clustering results kept in memory
+CLUSTERING_CACHE_SIZE = 8
+
+
+def prepare_features_for_clustering(features_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Scale features for clustering.
     
+    Standardizes each column to zero mean and unit variance (same as
+    StandardScaler, zero-variance columns are left unscaled).
+    
     Args:
         features_df: DataFrame with user features
         
     Returns:
-        Tuple of (scaled_features_df, scaler)
+        Tuple of (scaled_features, mean, std) as float32 arrays
     """
     # These are the features we use for clustering
     feature_columns = [
@@ -35,34 +46,81 @@ def prepare_features_for_clustering(features_df: pd.DataFrame) -> Tuple[pd.DataF
         raise ValueError("No valid feature columns found for clustering")
     
     # Get the feature matrix
-    X = features_df[available_columns].values
+    X = features_df[available_columns].to_numpy(dtype=np.float32, copy=True)
     
-    # Scale everything (important for KMeans)
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    # Scale everything in place (important for KMeans)
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1
+    X -= mean
+    X /= std
     
-    # Put it back in a DataFrame
-    scaled_df = pd.DataFrame(X_scaled, columns=available_columns, index=features_df.index)
+    return X, mean, std
+
+
+def _fit_kmeans(X: np.ndarray, n_clusters: int, random_state: Union[int, np.random.RandomState, None],
+                init_centers: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Union[KMeans, MiniBatchKMeans]]:
+    """Fit the clustering model on a float32 matrix and return (labels, model)"""
+    if init_centers is not None:
+        # Warm start from previous centers - one init, short refinement
+        kmeans = KMeans(n_clusters=n_clusters, init=np.asarray(init_centers, dtype=np.float32),
+                        n_init=1, max_iter=50, random_state=random_state)
+    elif len(X) > MINIBATCH_THRESHOLD:
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=1024, random_state=random_state, n_init=3)
+    else:
+        # Keep the 10 restarts here - a single k-means++ init lands in visibly
+        # worse partitions on small groups, and the fit is cheap at this size
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10, algorithm='elkan')
+    cluster_labels = kmeans.fit_predict(X)
     
-    return scaled_df, scaler
+    return cluster_labels, kmeans
 
 
-def perform_clustering(scaled_features: pd.DataFrame, n_clusters: int = 5, random_state: int = 42) -> Tuple[np.ndarray, KMeans]:
+@lru_cache(maxsize=CLUSTERING_CACHE_SIZE)
+def _cached_fit_kmeans(x_bytes: bytes, shape: Tuple[int, int], n_clusters: int,
+                       random_state: int) -> Tuple[np.ndarray, Union[KMeans, MiniBatchKMeans]]:
+    """Same as _fit_kmeans, memoized on the raw matrix bytes and settings"""
+    X = np.frombuffer(x_bytes, dtype=np.float32).reshape(shape)
+    return _fit_kmeans(X, n_clusters, random_state)
+
+
+def perform_clustering(scaled_features: np.ndarray, n_clusters: int = 5,
+                       random_state: Union[int, np.random.RandomState, None] = 42,
+                       init_centers: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Union[KMeans, MiniBatchKMeans]]:
     """
     Perform KMeans clustering on scaled features.
     
+    Uses KMeans with 10 restarts; large groups (more than
+    MINIBATCH_THRESHOLD users) use MiniBatchKMeans with fewer inits.
+    Results are cached, so re-clustering the same matrix with the same
+    settings (e.g. while tuning) skips the fit - only for an integer
+    random_state. The cached model is shared between callers and shouldn't
+    be mutated.
+    
     Args:
-        scaled_features: Scaled feature DataFrame
+        scaled_features: Scaled feature matrix
         n_clusters: Number of clusters
         random_state: Random state for reproducibility
+        init_centers: Optional (n_clusters, n_features) centers from a previous
+                      fit to warm start from (bypasses the cache)
         
     Returns:
         Tuple of (cluster_labels, kmeans_model)
     """
-    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
-    cluster_labels = kmeans.fit_predict(scaled_features.values)
+    # float32 halves memory traffic in the distance computations
+    X = np.ascontiguousarray(scaled_features, dtype=np.float32)
     
-    return cluster_labels, kmeans
+    if init_centers is not None:
+        return _fit_kmeans(X, n_clusters, random_state, init_centers)
+    
+    # Only a fixed integer seed gives a reproducible fit worth memoizing -
+    # None should refit every time and RandomState instances aren't hashable
+    if not isinstance(random_state, numbers.Integral):
+        return _fit_kmeans(X, n_clusters, random_state)
+    
+    cluster_labels, kmeans = _cached_fit_kmeans(X.tobytes(), X.shape, n_clusters, random_state)
+    
+    return cluster_labels.copy(), kmeans
 
 
 def assign_clusters(features_df: pd.DataFrame, n_clusters: int = 5, random_state: int = 42) -> pd.DataFrame:
@@ -78,7 +136,7 @@ def assign_clusters(features_df: pd.DataFrame, n_clusters: int = 5, random_state
         DataFrame with cluster labels added
     """
     # Scale the features first
-    scaled_features, scaler = prepare_features_for_clustering(features_df)
+    scaled_features, _, _ = prepare_features_for_clustering(features_df)
     
     # Run KMeans
     cluster_labels, kmeans = perform_clustering(scaled_features, n_clusters, random_state)
@@ -8,120 +8,254 @@ import numpy as np
 from typing import Dict
 import re
 
+# Regex for emojis - covers most common ones
+EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE
+)
+
+# Simple URL pattern - http(s):// followed by one negated character class
+# (no alternation, so matching stays linear without backtracking)
+URL_RE = re.compile(r'https?://[^\s<>"\'\]\)]+')
+
+# ASCII uppercase letters (counted per message for uppercase_ratio)
+UPPER_RE = re.compile(r'[A-Z]')
+
+# numba is optional - without it we fall back to pandas string ops
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Below this many messages the pandas string ops are fast enough that
+# compiling the numba scan (a couple of seconds on a cold start) doesn't pay off
+NUMBA_MIN_MESSAGES = 100_000
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _is_emoji(c):
+        # Same codepoint ranges as EMOJI_RE
+        return ((0x1F600 <= c <= 0x1F64F) or (0x1F300 <= c <= 0x1F5FF) or
+                (0x1F680 <= c <= 0x1F6FF) or (0x1F1E0 <= c <= 0x1F1FF) or
+                (0x2702 <= c <= 0x27B0) or (0x24C2 <= c <= 0x1F251))
+
+    # Serial on purpose: app sessions call this from concurrent threads, and
+    # parallel numba functions can abort the process under the workqueue layer
+    @njit(cache=True)
+    def _scan_codepoints(codepoints, offsets, out):
+        # One pass per message: exclamations, questions, emoji runs, uppercase, length
+        for i in range(offsets.shape[0] - 1):
+            ex = q = em = up = 0
+            in_emoji = False
+            for j in range(offsets[i], offsets[i + 1]):
+                c = codepoints[j]
+                if _is_emoji(c):
+                    # The regex matches runs of emojis, so count each run once
+                    if not in_emoji:
+                        em += 1
+                    in_emoji = True
+                    continue
+                in_emoji = False
+                if c == 33:
+                    ex += 1
+                elif c == 63:
+                    q += 1
+                elif 65 <= c <= 90:
+                    up += 1
+            out[i, 0] = ex
+            out[i, 1] = q
+            out[i, 2] = em
+            out[i, 3] = up
+            out[i, 4] = offsets[i + 1] - offsets[i]
+
+
+def scan_messages(messages: pd.Series) -> np.ndarray:
+    """
+    Count emotional indicators for every message in a single compiled pass.
+    
+    Requires numba.
+    
+    Args:
+        messages: Series of message strings
+        
+    Returns:
+        int32 array of shape (n, 5) with columns:
+        exclamations, questions, emojis, uppercase letters, length
+    """
+    texts = messages.tolist()
+    # Flatten everything into one codepoint buffer plus row offsets
+    codepoints = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    
+    out = np.empty((len(texts), 5), dtype=np.int32)
+    _scan_codepoints(codepoints, offsets, out)
+    return out
+
 
 def calculate_message_length_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate message length stats per user"""
-    user_stats = df.groupby('user')['message'].agg([
-        ('avg_length', lambda x: x.str.len().mean()),
-        ('median_length', lambda x: x.str.len().median()),
-        ('total_chars', lambda x: x.str.len().sum())
-    ]).reset_index()
+    """Calculate message length stats per user (indexed by user)"""
+    # Measure every message once, then let pandas do the per-user reductions
+    df = df.assign(msg_len=df['message'].str.len().astype('int32'))
+    user_stats = df.groupby('user', observed=True, sort=False)['msg_len'].agg(
+        avg_length='mean',
+        median_length='median',
+        total_chars='sum'
+    )
+    # The grouped sum keeps int32, which can overflow on very large exports
+    user_stats['total_chars'] = user_stats['total_chars'].astype('int64')
     
     return user_stats
 
 
 def calculate_temporal_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate temporal activity features per user"""
-    df = df.copy()  # Don't mess with the original
-    df['hour'] = df['timestamp'].dt.hour
-    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    """Calculate temporal activity features per user (indexed by user)"""
+    # Work on the timestamp values directly instead of copying the whole frame
+    ts = df['timestamp'].values
+    hours = (ts.astype('datetime64[h]').astype(np.int64) % 24).astype(np.int8)
     
     # Calculate messages per day for each user
-    df['date'] = df['timestamp'].dt.date
-    messages_per_day = df.groupby(['user', 'date']).size().reset_index(name='daily_count')
-    avg_messages_per_day = messages_per_day.groupby('user')['daily_count'].mean().reset_index(name='messages_per_day')
-    
-    # Response time - time between a user's consecutive messages
-    df_sorted = df.sort_values('timestamp')
-    df_sorted['time_diff'] = df_sorted.groupby('user')['timestamp'].diff()
-    avg_response_time = df_sorted.groupby('user')['time_diff'].mean().dt.total_seconds() / 3600  # hours
-    avg_response_time = avg_response_time.reset_index(name='avg_response_time_hours')
-    avg_response_time['avg_response_time_hours'] = avg_response_time['avg_response_time_hours'].fillna(0)
-    
-    # Night activity - messages between 10 PM and 6 AM
-    night_mask = (df['hour'] >= 22) | (df['hour'] < 6)
-    night_activity = df[night_mask].groupby('user').size() / df.groupby('user').size()
-    night_activity = night_activity.reset_index(name='night_activity_ratio')
-    night_activity['night_activity_ratio'] = night_activity['night_activity_ratio'].fillna(0)
-    
-    # Merge everything together
-    temporal_features = avg_messages_per_day.merge(
-        avg_response_time, on='user', how='left'
-    ).merge(
-        night_activity, on='user', how='left'
+    # (int64 day index rather than boxed datetime.date objects)
+    date_id = pd.Series(ts.astype('datetime64[D]').view('int64'), index=df.index, name='date_id')
+    messages_per_day = df.groupby([df['user'], date_id], observed=True, sort=False).size().reset_index(name='daily_count')
+    avg_messages_per_day = messages_per_day.groupby('user', observed=True, sort=False)['daily_count'].mean().rename('messages_per_day')
+    
+    # Per-message response gap and night flag, so both reduce in a single groupby
+    per_message = pd.DataFrame({
+        'user': df['user'],
+        'timestamp': df['timestamp'],
+        # Night activity - messages between 10 PM and 6 AM
+        'is_night': ((hours >= 22) | (hours < 6)).astype('int8')
+    }).sort_values('timestamp')
+    
+    # Response time - time between a user's consecutive messages (hours)
+    per_message['tdiff_h'] = per_message.groupby('user', observed=True)['timestamp'].diff().dt.total_seconds() / 3600
+    
+    per_user = per_message.groupby('user', observed=True, sort=False).agg(
+        avg_response_time_hours=('tdiff_h', 'mean'),
+        night_activity_ratio=('is_night', 'mean')
     )
+    per_user['avg_response_time_hours'] = per_user['avg_response_time_hours'].fillna(0)
+    
+    temporal_features = avg_messages_per_day.to_frame().join(per_user)
     
     return temporal_features
 
 
-def calculate_emotional_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate emotional expressiveness features"""
-    df = df.copy()
-    
-    # Regex for emojis - covers most common ones
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map
-        "\U0001F1E0-\U0001F1FF"  # flags
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "]+", flags=re.UNICODE
-    )
+# Smallest dtypes that safely hold the per-message indicators
+INDICATOR_DTYPES = {
+    'exclamation_count': 'int32',
+    'question_count': 'int32',
+    'emoji_count': 'int32',
+    'uppercase_ratio': 'float32'
+}
+
+
+def emotional_indicators(messages: pd.Series) -> pd.DataFrame:
+    """Per-message emotional indicator columns, aligned with the messages index"""
+    # Count various emotional indicators (compiled scan only for large chats)
+    if NUMBA_AVAILABLE and len(messages) >= NUMBA_MIN_MESSAGES:
+        counts = scan_messages(messages)
+        return pd.DataFrame({
+            'exclamation_count': counts[:, 0],
+            'question_count': counts[:, 1],
+            'emoji_count': counts[:, 2],
+            'uppercase_ratio': counts[:, 3] / np.maximum(counts[:, 4], 1)
+        }, index=messages.index).astype(INDICATOR_DTYPES)
     
-    # Count various emotional indicators
-    df['exclamation_count'] = df['message'].str.count('!')
-    df['question_count'] = df['message'].str.count('\?')
-    df['emoji_count'] = df['message'].apply(lambda x: len(emoji_pattern.findall(x)))
-    df['uppercase_ratio'] = df['message'].apply(lambda x: sum(1 for c in x if c.isupper()) / max(len(x), 1))
+    return pd.DataFrame({
+        'exclamation_count': messages.str.count('!'),
+        'question_count': messages.str.count('\\?'),
+        'emoji_count': messages.str.count(EMOJI_RE),
+        'uppercase_ratio': messages.str.count(UPPER_RE) / messages.str.len().clip(lower=1)
+    }, index=messages.index).astype(INDICATOR_DTYPES)
+
+
+def link_indicators(messages: pd.Series) -> pd.DataFrame:
+    """Per-message has_link column, aligned with the messages index"""
+    return pd.DataFrame({
+        'has_link': messages.str.contains(URL_RE, regex=True, na=False)
+    }, index=messages.index)
+
+
+# Named aggregations for the per-message content columns
+EMOTIONAL_AGGREGATIONS = {
+    'avg_exclamations': ('exclamation_count', 'mean'),
+    'avg_questions': ('question_count', 'mean'),
+    'avg_emojis': ('emoji_count', 'mean'),
+    'uppercase_ratio': ('uppercase_ratio', 'mean'),
+}
+
+LINK_AGGREGATIONS = {
+    'total_links': ('has_link', 'sum'),
+    'link_sharing_ratio': ('has_link', 'mean'),
+}
+
+
+def calculate_emotional_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Calculate emotional expressiveness features (indexed by user)"""
+    indicators = emotional_indicators(df['message'])
     
     # Average these per user
-    emotional_features = df.groupby('user').agg({
-        'exclamation_count': 'mean',
-        'question_count': 'mean',
-        'emoji_count': 'mean',
-        'uppercase_ratio': 'mean'
-    }).reset_index()
-    
-    emotional_features.columns = ['user', 'avg_exclamations', 'avg_questions', 'avg_emojis', 'uppercase_ratio']
-    
-    return emotional_features
+    return indicators.groupby(df['user'], observed=True, sort=False).agg(**EMOTIONAL_AGGREGATIONS)
 
 
 def calculate_link_sharing_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate link/resource sharing features"""
-    df = df.copy()
+    """Calculate link/resource sharing features (indexed by user)"""
+    indicators = link_indicators(df['message'])
     
-    # Simple URL pattern - catches http and https links
-    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+    return indicators.groupby(df['user'], observed=True, sort=False).agg(**LINK_AGGREGATIONS)
+
+
+def calculate_content_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate emotional and link sharing features together (indexed by user)
     
-    df['has_link'] = df['message'].apply(lambda x: bool(url_pattern.search(x)))
-    link_sharing = df.groupby('user').agg({
-        'has_link': ['sum', 'mean']
-    }).reset_index()
-    link_sharing.columns = ['user', 'total_links', 'link_sharing_ratio']
+    Same columns as calculate_emotional_features plus
+    calculate_link_sharing_features, but shares a single groupby.
+    """
+    # Only the small numeric indicator columns are built; the message text is never copied
+    indicators = pd.concat([emotional_indicators(df['message']), link_indicators(df['message'])], axis=1)
     
-    return link_sharing
+    return indicators.groupby(df['user'], observed=True, sort=False).agg(
+        **EMOTIONAL_AGGREGATIONS, **LINK_AGGREGATIONS
+    )
 
 
 def calculate_conversation_initiation_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate conversation initiation features"""
-    df_sorted = df.sort_values('timestamp').reset_index(drop=True)
+    """Calculate conversation initiation features (indexed by user)"""
+    users = pd.Categorical(df['user'])
+    
+    # Walk the timestamps in order (stable sort, so ties keep message order)
+    ts = df['timestamp'].values
+    order = np.argsort(ts, kind='mergesort')
+    ts_sorted = ts[order]
     
     # A conversation starts if there's a gap > 1 hour (or it's the first message)
-    df_sorted['time_diff'] = df_sorted['timestamp'].diff()
-    df_sorted['is_conversation_start'] = (df_sorted['time_diff'] > pd.Timedelta(hours=1)) | (df_sorted.index == 0)
+    is_start = np.empty(len(ts_sorted), dtype=bool)
+    is_start[:1] = True
+    is_start[1:] = np.diff(ts_sorted) > np.timedelta64(1, 'h')
     
-    # Count initiations per user
-    initiations = df_sorted[df_sorted['is_conversation_start']].groupby('user').size().reset_index(name='initiations')
+    # Count initiations and total messages per user code
+    n_users = len(users.categories)
+    initiations = np.bincount(users.codes[order], weights=is_start, minlength=n_users)
+    total_messages = np.bincount(users.codes, minlength=n_users)
     
-    # Total messages per user
-    total_messages = df.groupby('user').size().reset_index(name='total_messages')
+    initiation_features = pd.DataFrame({
+        'total_messages': total_messages,
+        'initiations': initiations.astype(np.int64)
+    }, index=pd.Index(users.categories, name='user'))
+    initiation_features = initiation_features[initiation_features['total_messages'] > 0]
     
     # Calculate the ratio
-    initiation_features = total_messages.merge(initiations, on='user', how='left')
-    initiation_features['initiations'] = initiation_features['initiations'].fillna(0)
     initiation_features['initiation_ratio'] = initiation_features['initiations'] / initiation_features['total_messages']
     
     return initiation_features
@@ -137,20 +271,29 @@ def extract_all_features(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with user features
     """
+    # Categorical users so every groupby below hashes small integer codes
+    df = df.assign(user=df['user'].astype('category'))
+    
     # Calculate all feature groups
     length_features = calculate_message_length_features(df)
     temporal_features = calculate_temporal_features(df)
-    emotional_features = calculate_emotional_features(df)
-    link_features = calculate_link_sharing_features(df)
+    content_features = calculate_content_features(df)
     initiation_features = calculate_conversation_initiation_features(df)
     
-    # Merge everything together
-    features = length_features.merge(temporal_features, on='user', how='outer')
-    features = features.merge(emotional_features, on='user', how='outer')
-    features = features.merge(link_features, on='user', how='outer')
-    features = features.merge(initiation_features, on='user', how='outer')
+    # Align everything on the user index in one go
+    features = pd.concat(
+        [length_features, temporal_features, content_features, initiation_features], axis=1
+    ).sort_index()
     
     # Fill missing values with 0
-    features = features.fillna(0)
+    features = features.fillna(0).reset_index()
+    
+    # float32 is plenty for the per-user averages/ratios and halves downstream
+    # memory traffic (count columns stay integer). Per-message gaps and their
+    # means are still computed in float64 - only the per-user results are
+    # rounded, and clustering standardizes in float32 anyway, so the cluster
+    # assignments don't change.
+    features = features.astype({col: 'float32' for col in features.select_dtypes('floating').columns})
+    features['user'] = features['user'].astype(str)
     
     return features
@@ -3,7 +3,8 @@ Sample chat generator for demonstration purposes
 Generates synthetic WhatsApp group chat data with realistic behavioral patterns
 """
 
-import random
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Tuple
 
@@ -15,97 +16,155 @@ USER_NAMES = [
     "Cameron White", "Dakota Harris", "Emery Clark", "Finley Lewis", "Harper Walker"
 ]
 
-# Message templates for different behaviors
-SHORT_MESSAGES = [
+# Message templates for different behaviors (immutable tuples)
+SHORT_MESSAGES = (
     "Okay", "Sure", "Thanks", "Got it", "Sounds good", "Agreed", "Yes", "No",
     "Maybe", "I see", "Interesting", "Cool", "Nice", "Haha", "Lol"
-]
+)
 
-MEDIUM_MESSAGES = [
+MEDIUM_MESSAGES = (
     "That makes sense to me", "I think we should consider this option",
     "Let me check and get back to you", "We could try a different approach",
     "Has anyone looked into this yet?", "I'll follow up on that",
     "Good point, we should discuss this", "What do others think about this?",
     "I have some thoughts on this topic", "Let's schedule a meeting to discuss"
-]
+)
 
-LONG_MESSAGES = [
+LONG_MESSAGES = (
     "I've been thinking about this issue and I believe we need to take a comprehensive approach. There are several factors to consider including timing, resources, and potential impact on the team. What do you all think?",
     "Based on my research, I found some interesting information that might be relevant. The key points are: first, we need to understand the context better; second, we should evaluate all options; and third, we need stakeholder buy-in before proceeding.",
     "I wanted to share an update on the project. We've made good progress but there are a few challenges we need to address. The main concern is around timeline and we might need to adjust our expectations. Let me know your thoughts."
-]
+)
 
-LINK_MESSAGES = [
+LINK_MESSAGES = (
     "Check this out: https://example.com/article",
     "Found this interesting: https://example.com/resource",
     "This might be useful: https://example.com/reference",
     "Worth reading: https://example.com/guide",
     "Shared a link: https://example.com/tutorial"
-]
+)
 
-EMOJI_MESSAGES = [
+EMOJI_MESSAGES = (
     "That's great! 😊", "Awesome! 🎉", "Love it! ❤️", "So excited! 🚀",
     "Amazing work! 👏", "Perfect! ✅", "Well done! 🎊", "Fantastic! 🌟",
     "This is cool! 😎", "Nice one! 👍", "Haha that's funny! 😂", "Wow! 🤩"
-]
+)
 
-NIGHT_MESSAGES = [
+NIGHT_MESSAGES = (
     "Still working on this", "Late night thoughts", "Anyone else up?",
     "Just finished reviewing", "Working late tonight", "Can't sleep, thinking about this"
-]
+)
+
+# All message templates in one array, so a batch of messages can be picked
+# with a single np.take. Pools are addressed by kind via offset/size.
+_MESSAGE_POOLS = [LINK_MESSAGES, EMOJI_MESSAGES, NIGHT_MESSAGES,
+                  SHORT_MESSAGES, MEDIUM_MESSAGES, LONG_MESSAGES]
+KIND_LINK, KIND_EMOJI, KIND_NIGHT = 0, 1, 2
+LENGTH_KINDS = {"short": 3, "medium": 4, "long": 5}
+MESSAGE_ARRAY = np.array([m for pool in _MESSAGE_POOLS for m in pool], dtype=object)
+POOL_SIZES = np.array([len(pool) for pool in _MESSAGE_POOLS])
+POOL_OFFSETS = np.concatenate(([0], np.cumsum(POOL_SIZES)[:-1]))
+
+# Behavioral characteristics per profile type, in assignment order
+_PROFILES = {
+    "silent": {"message_prob": 0.05, "length": "short", "emoji": 0.1, "links": 0.0, "night": 0.1},
+    "dominant": {"message_prob": 0.25, "length": "long", "emoji": 0.2, "links": 0.3, "night": 0.2},
+    "night_owl": {"message_prob": 0.15, "length": "medium", "emoji": 0.3, "links": 0.1, "night": 0.7},
+    "link_sharer": {"message_prob": 0.12, "length": "medium", "emoji": 0.1, "links": 0.6, "night": 0.2},
+    "emoji_heavy": {"message_prob": 0.18, "length": "short", "emoji": 0.8, "links": 0.0, "night": 0.3},
+    "regular": {"message_prob": 0.10, "length": "medium", "emoji": 0.3, "links": 0.1, "night": 0.2}
+}
+_PROFILE_TYPES = tuple(_PROFILES)
+
+# Name -> position in USER_NAMES
+_USER_INDEX = {name: i for i, name in enumerate(USER_NAMES)}
 
 
 def generate_user_profile(user_name: str) -> dict:
-    """Assign behavioral characteristics to a user"""
-    profiles = {
-        "silent": {"message_prob": 0.05, "length": "short", "emoji": 0.1, "links": 0.0, "night": 0.1},
-        "dominant": {"message_prob": 0.25, "length": "long", "emoji": 0.2, "links": 0.3, "night": 0.2},
-        "night_owl": {"message_prob": 0.15, "length": "medium", "emoji": 0.3, "links": 0.1, "night": 0.7},
-        "link_sharer": {"message_prob": 0.12, "length": "medium", "emoji": 0.1, "links": 0.6, "night": 0.2},
-        "emoji_heavy": {"message_prob": 0.18, "length": "short", "emoji": 0.8, "links": 0.0, "night": 0.3},
-        "regular": {"message_prob": 0.10, "length": "medium", "emoji": 0.3, "links": 0.1, "night": 0.2}
-    }
-    
-    # Assign profile based on user index for variety
-    user_index = USER_NAMES.index(user_name) if user_name in USER_NAMES else 0
-    profile_types = list(profiles.keys())
-    profile_type = profile_types[user_index % len(profile_types)]
-    
-    return profiles[profile_type]
+    """Assign behavioral characteristics to a user, based on user index for variety (shared dict - read only)"""
+    return _PROFILES[_PROFILE_TYPES[_USER_INDEX.get(user_name, 0) % len(_PROFILE_TYPES)]]
 
 
-def generate_message(user_name: str, profile: dict, timestamp: datetime) -> str:
-    """Generate a single message based on user profile"""
-    # Decide if this user should send a message
-    if random.random() > profile["message_prob"]:
-        return None
+def _generate_lines(rng: np.random.Generator, selected_users: List[str], num_messages: int) -> List[str]:
+    """
+    Draw num_messages chat lines for the given users, in timestamp order
     
-    # Choose message type
-    rand = random.random()
+    Args:
+        rng: NumPy random generator
+        selected_users: Users taking part in the chat
+        num_messages: Number of messages to generate
+        
+    Returns:
+        Formatted chat lines (without trailing newlines)
+    """
+    if num_messages <= 0:
+        return []
+    
+    # Generate user profiles, laid out as arrays indexed by user
+    user_profiles = [generate_user_profile(user) for user in selected_users]
+    message_prob = np.array([p["message_prob"] for p in user_profiles])
+    link_prob = np.array([p["links"] for p in user_profiles])
+    emoji_prob = np.array([p["emoji"] for p in user_profiles])
+    night_owl = np.array([p["night"] > 0.5 for p in user_profiles])
+    length_kind = np.array([LENGTH_KINDS[p["length"]] for p in user_profiles])
+    
+    # Start date (30 days ago)
+    current_date = np.datetime64(datetime.now() - timedelta(days=30), 'm')
     
-    if rand < profile["links"]:
-        # Link sharing message
-        message = random.choice(LINK_MESSAGES)
-    elif rand < profile["links"] + profile["emoji"]:
-        # Emoji-heavy message
-        message = random.choice(EMOJI_MESSAGES)
-    elif profile["night"] > 0.5 and (timestamp.hour >= 22 or timestamp.hour < 6):
-        # Night owl message
-        message = random.choice(NIGHT_MESSAGES)
-    else:
-        # Regular message based on length preference
-        if profile["length"] == "short":
-            message = random.choice(SHORT_MESSAGES)
-        elif profile["length"] == "long":
-            message = random.choice(LONG_MESSAGES)
-        else:
-            message = random.choice(MEDIUM_MESSAGES)
+    # Draw candidates in batches sized from the average send probability,
+    # topping up until enough messages were accepted
+    batch_size = int(num_messages / message_prob.mean() * 1.2) + 1
+    times, users, messages = [], [], []
+    accepted = 0
+    
+    while accepted < num_messages:
+        # Advance time (vary between 5 minutes and 4 hours), sometimes
+        # creating longer gaps (conversation breaks)
+        gaps = rng.integers(5, 241, size=batch_size)
+        gaps += (rng.random(batch_size) < 0.1) * rng.integers(2, 13, size=batch_size) * 60
+        candidate_times = current_date + np.cumsum(gaps).astype('timedelta64[m]')
+        current_date = candidate_times[-1]
+        
+        # Pick a random user per candidate and decide if they send a message
+        user_idx = rng.integers(0, len(selected_users), size=batch_size)
+        keep = rng.random(batch_size) <= message_prob[user_idx]
+        candidate_times = candidate_times[keep]
+        user_idx = user_idx[keep]
+        
+        # Choose message type
+        rand = rng.random(len(user_idx))
+        hours = (candidate_times - candidate_times.astype('datetime64[D]')).astype(int) // 60
+        is_night = (hours >= 22) | (hours < 6)
+        kind = np.select(
+            [
+                rand < link_prob[user_idx],
+                rand < link_prob[user_idx] + emoji_prob[user_idx],
+                night_owl[user_idx] & is_night,
+            ],
+            [KIND_LINK, KIND_EMOJI, KIND_NIGHT],
+            default=length_kind[user_idx],
+        )
+        pick = POOL_OFFSETS[kind] + (rng.random(len(kind)) * POOL_SIZES[kind]).astype(int)
+        
+        times.append(candidate_times)
+        users.append(user_idx)
+        messages.append(pick)
+        accepted += len(pick)
+    
+    # Timestamps are increasing by construction, so no sort is needed
+    times = np.concatenate(times)[:num_messages]
+    users = np.take(np.array(selected_users, dtype=object), np.concatenate(users)[:num_messages])
+    messages = np.take(MESSAGE_ARRAY, np.concatenate(messages)[:num_messages])
     
     # Format: DD/MM/YYYY, HH:MM - User: message
-    date_str = timestamp.strftime("%d/%m/%Y")
-    time_str = timestamp.strftime("%I:%M %p")
+    # (one vectorized strftime for all timestamps)
+    date_parts = pd.DatetimeIndex(times).strftime('%d/%m/%Y, %I:%M %p')
+    lines = [
+        f"{date_part} - {user}: {message}"
+        for date_part, user, message in zip(date_parts, users, messages)
+    ]
     
-    return f"{date_str}, {time_str} - {user_name}: {message}"
+    return lines
 
 
 def generate_sample_chat(output_file: str = "sample_chat.txt", num_messages: int = 550) -> None:
@@ -116,47 +175,21 @@ def generate_sample_chat(output_file: str = "sample_chat.txt", num_messages: int
         output_file: Path to output file
         num_messages: Target number of messages to generate
     """
-    # Select 10-15 users randomly
-    num_users = random.randint(10, 15)
-    selected_users = random.sample(USER_NAMES, num_users)
-    
-    # Generate user profiles
-    user_profiles = {user: generate_user_profile(user) for user in selected_users}
+    rng = np.random.default_rng()
     
-    # Start date (30 days ago)
-    start_date = datetime.now() - timedelta(days=30)
-    current_date = start_date
-    
-    messages = []
-    
-    # Generate messages over time
-    while len(messages) < num_messages:
-        # Advance time (vary between 5 minutes and 4 hours)
-        time_gap = timedelta(minutes=random.randint(5, 240))
-        current_date += time_gap
-        
-        # Sometimes create longer gaps (conversation breaks)
-        if random.random() < 0.1:
-            current_date += timedelta(hours=random.randint(2, 12))
-        
-        # Pick a random user
-        user = random.choice(selected_users)
-        profile = user_profiles[user]
-        
-        # Generate message
-        message = generate_message(user, profile, current_date)
-        if message:
-            messages.append((current_date, message))
+    # Select 10-15 users randomly
+    num_users = int(rng.integers(10, 16))
+    selected_users = rng.choice(USER_NAMES, size=num_users, replace=False).tolist()
     
-    # Sort messages by timestamp
-    messages.sort(key=lambda x: x[0])
+    lines = _generate_lines(rng, selected_users, num_messages)
     
-    # Write to file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for _, msg in messages:
-            f.write(msg + '\n')
+    # Write to file in one go through a large buffer
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        if lines:
+            f.write('\n'.join(lines))
+            f.write('\n')
     
-    print(f"Generated {len(messages)} messages from {num_users} users in {output_file}")
+    print(f"Generated {len(lines)} messages from {num_users} users in {output_file}")
 
 
 if __name__ == "__main__":
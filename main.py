@@ -11,17 +11,21 @@ from profiling import generate_profiles, get_cluster_name
 from report import generate_reports
 
 
-def analyze_chat(file_path: str, n_clusters: int = 5, random_state: int = 42,
-                 csv_output: str = None, pdf_output: str = None) -> pd.DataFrame:
+def analyze_chat(file_path: Union[str, TextIO, BinaryIO], n_clusters: int = 5, random_state: int = 42,
+                 csv_output: Union[str, BinaryIO] = None, pdf_output: Union[str, BinaryIO] = None,
+                 parquet_output: Union[str, BinaryIO] = None) -> pd.DataFrame:
     """
     Analyze WhatsApp chat and generate behavior reports
     
     Args:
-        file_path: Path to WhatsApp chat export file (.txt)
+        file_path: Path to WhatsApp chat export file (.txt) or file-like object
         n_clusters: Number of clusters for KMeans (default: 5)
         random_state: Random state for reproducibility (default: 42)
-        csv_output: Optional path for CSV report output
-        pdf_output: Optional path for PDF report output
+        csv_output: Optional path for CSV report output, or a binary buffer
+                    (e.g. io.BytesIO) to keep the report in memory
+        pdf_output: Optional path for PDF report output, or a binary buffer
+        parquet_output: Optional path or binary buffer for a Parquet copy of the
+                        CSV table (needs pyarrow; skipped if None)
         
     Returns:
         DataFrame with user features, clusters, and behavior profiles
@@ -48,7 +52,7 @@ def analyze_chat(file_path: str, n_clusters: int = 5, random_state: int = 42,
     
     # Finally, generate the reports
     print("Generating reports...")
-    generate_reports(features_df, csv_path=csv_output, pdf_path=pdf_output)
+    generate_reports(features_df, csv_path=csv_output, pdf_path=pdf_output, parquet_path=parquet_output)
     print("Analysis complete!")
     
     return features_df
@@ -100,12 +104,14 @@ def analyze_chat_streamlit(file_input: Union[str, TextIO, BinaryIO], n_clusters:
     additional_cols = [col for col in features_df.columns 
                       if col not in report_columns and col not in ['cluster', 'influence_score', 'behavior_profile']]
     
-    final_report = features_df[available_report_cols + additional_cols].copy()
+    final_report = features_df[available_report_cols + additional_cols]
     
-    # Add readable cluster names
-    final_report['cluster_name'] = final_report['cluster'].apply(
-        lambda x: get_cluster_name(x, cluster_names)
-    )
+    # Add readable cluster names (one lookup per cluster, not per user)
+    cluster_name_map = {
+        cluster_id: get_cluster_name(cluster_id, cluster_names)
+        for cluster_id in features_df['cluster'].unique()
+    }
+    final_report = final_report.assign(cluster_name=final_report['cluster'].map(cluster_name_map))
     
     # Summary stats per cluster
     cluster_summary = features_df.groupby('cluster').agg({
@@ -115,9 +121,7 @@ def analyze_chat_streamlit(file_input: Union[str, TextIO, BinaryIO], n_clusters:
     }).reset_index()
     
     cluster_summary.columns = ['cluster', 'user_count', 'avg_messages_per_day', 'avg_influence_score']
-    cluster_summary['cluster_name'] = cluster_summary['cluster'].apply(
-        lambda x: get_cluster_name(x, cluster_names)
-    )
+    cluster_summary['cluster_name'] = cluster_summary['cluster'].map(cluster_name_map)
     
     # Round to 2 decimals
     cluster_summary['avg_messages_per_day'] = cluster_summary['avg_messages_per_day'].round(2)
@@ -3,11 +3,100 @@ WhatsApp chat parser module
 Converts raw WhatsApp chat export to structured DataFrame
 """
 
+import codecs
 import re
 import pandas as pd
 from datetime import datetime
-from typing import List, Tuple, Union, TextIO, BinaryIO
-from io import TextIOWrapper
+from typing import Iterator, List, Tuple, Union, TextIO, BinaryIO
+from io import BufferedIOBase, RawIOBase, TextIOWrapper
+
+
+# Comprehensive pattern that handles multiple date/time formats.
+# Matched against one line at a time - stdlib re, since per-call overhead
+# outweighs engine speed on lines this short.
+MESSAGE_PATTERN = re.compile(
+    r"""
+    ^(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}),?\s*
+    (\d{1,2}:\d{2}(?:\s?[AP]M)?)\s*-\s*
+    (.*?):\s
+    (.*)$
+    """,
+    re.VERBOSE
+)
+
+# Just the leading "date, time -" part, to tell timestamped lines without a
+# "user:" (system notices like "X added Y") from message continuation lines
+TIMESTAMP_PREFIX = re.compile(
+    r"""
+    ^(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}),?\s*
+    (\d{1,2}:\d{2}(?:\s?[AP]M)?)\s*-
+    """,
+    re.VERBOSE
+)
+
+
+# Date formats tried in order, first match wins
+DATE_FORMATS = [
+    '%d/%m/%Y, %I:%M %p',  # DD/MM/YYYY with AM/PM
+    '%d/%m/%y, %I:%M %p',  # DD/MM/YY with AM/PM
+    '%m/%d/%Y, %I:%M %p',  # MM/DD/YYYY with AM/PM
+    '%m/%d/%y, %I:%M %p',  # MM/DD/YY with AM/PM
+    '%Y-%m-%d, %H:%M',      # YYYY-MM-DD 24-hour
+    '%d/%m/%Y, %H:%M',      # DD/MM/YYYY 24-hour
+    '%m/%d/%Y, %H:%M',      # MM/DD/YYYY 24-hour
+]
+
+
+def _parse_flexible(datetime_str: str) -> pd.Timestamp:
+    """Fallback for a single timestamp no known format matched (NaT if unparseable)"""
+    try:
+        return pd.to_datetime(datetime_str, dayfirst=True, errors='coerce')
+    except (ValueError, OverflowError):
+        return pd.NaT
+
+
+def _iter_lines(file_path: Union[str, TextIO, BinaryIO]) -> Iterator[str]:
+    """Yield the chat export line by line without reading it all into memory"""
+    # Handle both file paths and file-like objects (like from Streamlit)
+    if isinstance(file_path, str):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from f
+        return
+    
+    if hasattr(file_path, 'seek'):
+        file_path.seek(0)
+    
+    try:
+        # A zero-length read tells text streams from binary ones without
+        # consuming anything (text-mode tempfile wrappers aren't TextIOBase)
+        try:
+            kind = type(file_path.read(0))
+        except TypeError:
+            kind = None  # read() takes no size - handled by the last branch
+        
+        if kind is str and hasattr(file_path, '__iter__'):
+            yield from file_path
+        elif kind is bytes and isinstance(file_path, (BufferedIOBase, RawIOBase)):
+            # Binary stream - decode as we go, then let go of the stream
+            # without closing it
+            text = TextIOWrapper(file_path, encoding='utf-8')
+            try:
+                yield from text
+            finally:
+                text.detach()
+        elif kind is bytes and hasattr(file_path, '__iter__'):
+            # Other binary file-likes (e.g. tempfile wrappers) - decode incrementally
+            yield from codecs.getreader('utf-8')(file_path)
+        else:
+            # Bare object with just read() - fall back to reading it whole
+            content = file_path.read()
+            if isinstance(content, bytes):
+                content = content.decode('utf-8')
+            yield from content.splitlines(keepends=True)
+    finally:
+        # Reset in case it gets reused
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
 
 
 def parse_whatsapp_chat(file_path: Union[str, TextIO, BinaryIO]) -> pd.DataFrame:
@@ -25,82 +114,62 @@ def parse_whatsapp_chat(file_path: Union[str, TextIO, BinaryIO]) -> pd.DataFrame
     Returns:
         DataFrame with columns: timestamp, user, message
     """
-    messages = []
+    # Columnar buffers - cheaper than a list of per-row dicts
+    datetime_list = []
+    user_list = []
+    msg_list = []
     
-    # Handle both file paths and file-like objects (like from Streamlit)
-    if isinstance(file_path, str):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    else:
-        # It's a file-like object
-        try:
-            if hasattr(file_path, 'seek'):
-                file_path.seek(0)
-            content = file_path.read()
-            # Might be bytes, need to decode
-            if isinstance(content, bytes):
-                content = content.decode('utf-8')
-        except (AttributeError, UnicodeDecodeError):
-            # Try wrapping it as text
-            if hasattr(file_path, 'seek'):
-                file_path.seek(0)
-            content = TextIOWrapper(file_path, encoding='utf-8').read()
-        
-        # Reset in case it gets reused
-        if hasattr(file_path, 'seek'):
-            file_path.seek(0)
+    # Lines of the message currently being read (multi-line messages
+    # continue on lines that don't start with a timestamp)
+    current_parts = None
     
-    # Comprehensive pattern that handles multiple date/time formats
-    pattern = re.compile(
-        r"""
-        ^(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}),?\s*
-        (\d{1,2}:\d{2}(?:\s?[AP]M)?)\s*-\s*
-        (.*?):\s
-        (.*)$
-        """,
-        re.VERBOSE | re.MULTILINE
-    )
+    for line in _iter_lines(file_path):
+        match = MESSAGE_PATTERN.match(line)
+        if match or TIMESTAMP_PREFIX.match(line):
+            # Any timestamped line ends the message before it
+            if current_parts is not None:
+                msg_list.append("\n".join(current_parts).strip())
+                current_parts = None
+            if match:
+                date_str, time_str, user, message = match.groups()
+                datetime_list.append(f"{date_str}, {time_str}".strip())
+                user_list.append(user.strip())
+                current_parts = [message]
+            # else: system notice without a sender - dropped
+        elif current_parts is not None:
+            current_parts.append(line.rstrip("\r\n"))
     
-    matches = pattern.findall(content)
+    if current_parts is not None:
+        msg_list.append("\n".join(current_parts).strip())
     
-    for match in matches:
-        date_str, time_str, user, message = match
-        datetime_str = f"{date_str}, {time_str}".strip()
-        
-        # Try different date formats
-        date_formats = [
-            '%d/%m/%Y, %I:%M %p',  # DD/MM/YYYY with AM/PM
-            '%d/%m/%y, %I:%M %p',  # DD/MM/YY with AM/PM
-            '%m/%d/%Y, %I:%M %p',  # MM/DD/YYYY with AM/PM
-            '%m/%d/%y, %I:%M %p',  # MM/DD/YY with AM/PM
-            '%Y-%m-%d, %H:%M',      # YYYY-MM-DD 24-hour
-            '%d/%m/%Y, %H:%M',      # DD/MM/YYYY 24-hour
-            '%m/%d/%Y, %H:%M',      # MM/DD/YYYY 24-hour
-        ]
-        
-        timestamp = None
-        for fmt in date_formats:
-            try:
-                timestamp = pd.to_datetime(datetime_str, format=fmt)
-                break
-            except:
-                continue
-        
-        # If format matching failed, try pandas flexible parser
-        if timestamp is None:
-            try:
-                timestamp = pd.to_datetime(datetime_str, dayfirst=True, errors='coerce')
-            except:
-                continue
-        
-        if pd.notna(timestamp):
-            messages.append({
-                'timestamp': timestamp,
-                'user': user.strip(),
-                'message': message.strip()
-            })
+    # Parse all timestamps at once, one vectorized pass per format;
+    # each pass only looks at rows that earlier formats couldn't parse
+    datetime_strs = pd.Series(datetime_list, dtype=object)
+    timestamps = pd.to_datetime(datetime_strs, format=DATE_FORMATS[0], errors='coerce')
+    for fmt in DATE_FORMATS[1:]:
+        missing = timestamps.isna()
+        if not missing.any():
+            break
+        timestamps = timestamps.combine_first(
+            pd.to_datetime(datetime_strs[missing], format=fmt, errors='coerce')
+        )
+    
+    # If format matching failed, try pandas flexible parser on what's left
+    missing = timestamps.isna()
+    if missing.any():
+        fallback = pd.Series(
+            [_parse_flexible(value) for value in datetime_strs[missing]],
+            index=datetime_strs.index[missing]
+        )
+        timestamps = timestamps.combine_first(fallback)
     
-    df = pd.DataFrame(messages)
+    # Drop anything that still couldn't be parsed
+    valid = timestamps.notna().to_numpy()
+    df = pd.DataFrame({
+        'timestamp': timestamps[valid].reset_index(drop=True),
+        'user': pd.Series(user_list)[valid].reset_index(drop=True),
+        'message': pd.Series(msg_list)[valid].reset_index(drop=True)
+    })
     
     if df.empty:
         raise ValueError(
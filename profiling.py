@@ -7,6 +7,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict
 
+# numba is optional - without it influence scores use plain NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Default cluster names - only works when n_clusters=5
 # For other cluster counts, you'll get generic "Cluster X" names
@@ -37,6 +43,48 @@ def get_cluster_name(cluster_id: int, cluster_names: dict = None) -> str:
     return DEFAULT_CLUSTER_NAMES.get(cluster_id, f"Cluster {cluster_id}")
 
 
+def _feature_column(features_df: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    """Column as a float64 array, or a constant default if the column is missing"""
+    if name in features_df.columns:
+        return features_df[name].to_numpy(dtype=np.float64)
+    return np.full(len(features_df), default, dtype=np.float64)
+
+
+def _influence_from_metrics(messages_per_day, initiation_ratio, avg_response_time):
+    """Influence formula over scalars or NumPy arrays (elementwise)"""
+    # Activity score - normalize to 5 msg/day = max score
+    activity_score = np.minimum(messages_per_day / 5.0, 1.0)
+    
+    # Engagement - faster responses = higher score
+    response_score = 1.0 - np.minimum(avg_response_time / 24.0, 1.0)
+    
+    # Initiation score
+    initiation_score = np.minimum(initiation_ratio * 10, 1.0)
+    
+    # Weighted combination
+    influence = (activity_score * 0.4 + response_score * 0.3 + initiation_score * 0.3)
+    
+    return np.clip(influence, 0.0, 1.0)
+
+
+if NUMBA_AVAILABLE:
+    # No fastmath: it reorders the float ops, and scores must match the
+    # NumPy fallback exactly so the rounded report values don't depend on numba.
+    # Not parallel either: there's one element per user (usually tens), and
+    # thread startup would cost more than the loop.
+    @njit(cache=True)
+    def _influence_kernel(messages_per_day, initiation_ratio, avg_response_time):
+        """Same formula as _influence_from_metrics, fused into one pass over the users"""
+        out = np.empty_like(messages_per_day)
+        for i in range(messages_per_day.shape[0]):
+            activity_score = min(messages_per_day[i] / 5.0, 1.0)
+            response_score = 1.0 - min(avg_response_time[i] / 24.0, 1.0)
+            initiation_score = min(initiation_ratio[i] * 10, 1.0)
+            influence = activity_score * 0.4 + response_score * 0.3 + initiation_score * 0.3
+            out[i] = max(0.0, min(influence, 1.0))
+        return out
+
+
 def calculate_influence_score(features: pd.Series) -> float:
     """
     Calculate influence score based on activity and engagement.
@@ -47,40 +95,53 @@ def calculate_influence_score(features: pd.Series) -> float:
     Returns:
         Influence score between 0 and 1
     """
-    # Get the key metrics
-    messages_per_day = features.get('messages_per_day', 0)
-    initiation_ratio = features.get('initiation_ratio', 0)
-    avg_response_time = features.get('avg_response_time_hours', 24)
-    
-    # Activity score - normalize to 5 msg/day = max score
-    activity_score = min(messages_per_day / 5.0, 1.0)
-    
-    # Engagement - faster responses = higher score
-    response_score = 1.0 - min(avg_response_time / 24.0, 1.0)
-    
-    # Initiation score
-    initiation_score = min(initiation_ratio * 10, 1.0)
+    return float(_influence_from_metrics(
+        features.get('messages_per_day', 0),
+        features.get('initiation_ratio', 0),
+        features.get('avg_response_time_hours', 24)
+    ))
+
+
+def calculate_influence_scores(features_df: pd.DataFrame) -> np.ndarray:
+    """
+    Calculate influence scores for all users at once.
     
-    # Weighted combination
-    influence = (activity_score * 0.4 + response_score * 0.3 + initiation_score * 0.3)
+    Vectorized equivalent of calculate_influence_score over each row.
+    Uses a compiled numba kernel when numba is installed.
     
-    return min(max(influence, 0.0), 1.0)
+    Args:
+        features_df: DataFrame with user features
+        
+    Returns:
+        Array of influence scores between 0 and 1
+    """
+    metrics = (
+        _feature_column(features_df, 'messages_per_day', 0),
+        _feature_column(features_df, 'initiation_ratio', 0),
+        _feature_column(features_df, 'avg_response_time_hours', 24)
+    )
+    if NUMBA_AVAILABLE:
+        return _influence_kernel(*metrics)
+    return _influence_from_metrics(*metrics)
 
 
-def generate_behavior_profile(features: pd.Series, cluster_id: int) -> str:
+def generate_behavior_profile(features: pd.Series, cluster_id: int, influence_score: float = None) -> str:
     """
     Generate natural language behavior profile for a user.
     
     Args:
         features: Series with user features
         cluster_id: Cluster assignment
+        influence_score: Optional precomputed influence score
+                         (computed with calculate_influence_score if None)
         
     Returns:
         Behavior profile description
     """
     cluster_name = get_cluster_name(cluster_id)
     
-    profile_parts = [f"This user belongs to the '{cluster_name}' group."]
+    # Trait fragments, joined with ", " into the second sentence at the end
+    traits = []
     
     # Activity level
     messages_per_day = features.get('messages_per_day', 0)
@@ -93,14 +154,14 @@ def generate_behavior_profile(features: pd.Series, cluster_id: int) -> str:
     else:
         activity_level = "low activity"
     
-    profile_parts.append(f"This user is {activity_level},")
+    traits.append(f"This user is {activity_level}")
     
     # Message length preference
     avg_length = features.get('avg_length', 0)
     if avg_length >= 100:
-        profile_parts.append("writes long, detailed messages,")
+        traits.append("writes long, detailed messages")
     else:
-        profile_parts.append("prefers short messages,")
+        traits.append("prefers short messages")
     
     # Emotional expressiveness
     avg_emojis = features.get('avg_emojis', 0)
@@ -110,45 +171,107 @@ def generate_behavior_profile(features: pd.Series, cluster_id: int) -> str:
     emotional_score = avg_emojis + avg_exclamations * 0.5 + uppercase_ratio * 10
     
     if emotional_score >= 2:
-        profile_parts.append("emotionally expressive,")
+        traits.append("emotionally expressive")
     else:
-        profile_parts.append("emotionally reserved,")
+        traits.append("emotionally reserved")
     
     # Response speed
     avg_response_time = features.get('avg_response_time_hours', 24)
     if avg_response_time < 2:
-        profile_parts.append("responds quickly,")
+        traits.append("responds quickly")
     else:
-        profile_parts.append("responds slowly,")
+        traits.append("responds slowly")
     
     # Link sharing
     link_sharing_ratio = features.get('link_sharing_ratio', 0)
     if link_sharing_ratio > 0.1:
-        profile_parts.append("often shares links or resources,")
+        traits.append("often shares links or resources")
     
     # Night activity
     night_activity = features.get('night_activity_ratio', 0)
     if night_activity > 0.3:
-        profile_parts.append("more active at night,")
+        traits.append("more active at night")
     
     # Conversation initiation
     initiation_ratio = features.get('initiation_ratio', 0)
-    influence_score = calculate_influence_score(features)
+    if influence_score is None:
+        influence_score = calculate_influence_score(features)
     
     if initiation_ratio > 0.1 or influence_score > 0.95:
-        profile_parts.append("frequently initiates conversations and influences group flow.")
-    else:
-        # Remove trailing comma and add period
-        if profile_parts[-1].endswith(','):
-            profile_parts[-1] = profile_parts[-1].rstrip(',') + '.'
-        else:
-            profile_parts.append(".")
+        traits.append("frequently initiates conversations and influences group flow")
+    
+    return f"This user belongs to the '{cluster_name}' group. " + ", ".join(traits) + "."
+
+
+def generate_behavior_profiles(features_df: pd.DataFrame, influence_scores: np.ndarray = None) -> list:
+    """
+    Generate behavior profiles for all users at once.
+    
+    Vectorized equivalent of generate_behavior_profile over each row: every
+    qualitative level is picked with np.select on whole columns, then the
+    sentences are assembled in a single pass.
+    
+    Args:
+        features_df: DataFrame with user features and cluster assignments
+        influence_scores: Optional precomputed influence scores
+                          (computed with calculate_influence_scores if None)
+        
+    Returns:
+        List of behavior profile descriptions, in row order
+    """
+    if influence_scores is None:
+        influence_scores = calculate_influence_scores(features_df)
+    
+    messages_per_day = _feature_column(features_df, 'messages_per_day', 0)
+    total_messages = _feature_column(features_df, 'total_messages', 0)
+    
+    # Activity level
+    activity_level = np.select(
+        [(messages_per_day >= 4) | (total_messages >= 500),
+         (messages_per_day >= 2) | (total_messages >= 100)],
+        ["highly active", "moderately active"],
+        default="low activity"
+    )
     
-    # Clean up the profile
-    profile = " ".join(profile_parts)
-    profile = profile.replace(" ,", ",").replace("..", ".").replace(",.", ".")
+    # Message length preference
+    length_text = np.where(
+        _feature_column(features_df, 'avg_length', 0) >= 100,
+        "writes long, detailed messages", "prefers short messages"
+    )
     
-    return profile
+    # Emotional expressiveness
+    emotional_score = (_feature_column(features_df, 'avg_emojis', 0)
+                       + _feature_column(features_df, 'avg_exclamations', 0) * 0.5
+                       + _feature_column(features_df, 'uppercase_ratio', 0) * 10)
+    emotional_text = np.where(emotional_score >= 2, "emotionally expressive", "emotionally reserved")
+    
+    # Response speed
+    response_text = np.where(
+        _feature_column(features_df, 'avg_response_time_hours', 24) < 2,
+        "responds quickly", "responds slowly"
+    )
+    
+    # Optional traits
+    shares_links = _feature_column(features_df, 'link_sharing_ratio', 0) > 0.1
+    night_owl = _feature_column(features_df, 'night_activity_ratio', 0) > 0.3
+    initiator = ((_feature_column(features_df, 'initiation_ratio', 0) > 0.1)
+                 | (np.asarray(influence_scores) > 0.95))
+    
+    # Cluster names, looked up once per distinct cluster
+    cluster_ids = features_df['cluster'].to_numpy()
+    name_lookup = {cid: get_cluster_name(cid) for cid in pd.unique(cluster_ids)}
+    
+    return [
+        f"This user belongs to the '{name_lookup[cid]}' group. "
+        f"This user is {activity}, {length}, {emotional}, {response}"
+        f"{', often shares links or resources' if links else ''}"
+        f"{', more active at night' if night else ''}"
+        f"{', frequently initiates conversations and influences group flow.' if init else '.'}"
+        for cid, activity, length, emotional, response, links, night, init in zip(
+            cluster_ids, activity_level, length_text, emotional_text, response_text,
+            shares_links, night_owl, initiator
+        )
+    ]
 
 
 def generate_profiles(features_df: pd.DataFrame) -> pd.DataFrame:
@@ -164,13 +287,11 @@ def generate_profiles(features_df: pd.DataFrame) -> pd.DataFrame:
     features_df = features_df.copy()
     
     # Calculate influence scores
-    features_df['influence_score'] = features_df.apply(
-        lambda row: calculate_influence_score(row), axis=1
-    )
+    features_df['influence_score'] = calculate_influence_scores(features_df)
     
     # Generate profiles
-    features_df['behavior_profile'] = features_df.apply(
-        lambda row: generate_behavior_profile(row, row['cluster']), axis=1
+    features_df['behavior_profile'] = generate_behavior_profiles(
+        features_df, features_df['influence_score'].to_numpy()
     )
     
     return features_df
@@ -3,19 +3,115 @@ Report generation module.
 Generates CSV and PDF reports from analysis results.
 """
 
+import importlib.util
 import pandas as pd
-from typing import Optional
+from typing import Optional, Union, BinaryIO
 from profiling import get_cluster_name
 
 
-def generate_csv_report(features_df: pd.DataFrame, output_path: str = "user_behavior_report.csv", cluster_names: dict = None) -> None:
+# reportlab is only needed for the PDF report - CSV/Parquet work without it
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# pyarrow is only needed for the Parquet report. Just check that it's
+# installed - pandas imports it itself when writing.
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+PYARROW_MISSING_MESSAGE = "pyarrow is required for the Parquet report. Install it with: pip install pyarrow"
+
+
+if REPORTLAB_AVAILABLE:
+    # PDF styles, built once and shared by every report
+    _SAMPLE_STYLES = getSampleStyleSheet()
+    
+    TITLE_STYLE = ParagraphStyle(
+        'CustomTitle',
+        parent=_SAMPLE_STYLES['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    
+    HEADING_STYLE = ParagraphStyle(
+        'CustomHeading',
+        parent=_SAMPLE_STYLES['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    
+    BODY_STYLE = ParagraphStyle(
+        'CustomBody',
+        parent=_SAMPLE_STYLES['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=6,
+        leading=14
+    )
+
+# Optional columns shown per user in the PDF report, with defaults when missing
+PDF_COLUMN_DEFAULTS = {
+    'total_messages': 0,
+    'messages_per_day': 0,
+    'influence_score': 0,
+    'behavior_profile': 'No profile available.',
+}
+
+
+def _quote_if_needed(value: str) -> str:
+    """Quote a CSV field only if it contains a delimiter, quote or line break"""
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _format_csv(df: pd.DataFrame) -> str:
     """
-    Generate CSV report with user behavior analysis.
+    Format a DataFrame as CSV text, same output as to_csv(index=False).
+    
+    Columns are stringified vectorized and only text columns go through
+    quoting - numbers never need it.
+    
+    Args:
+        df: DataFrame to format
+        
+    Returns:
+        CSV text with a header line and a trailing newline
+    """
+    header = ','.join(_quote_if_needed(str(col)) for col in df.columns)
+    
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        text = values.astype(str).where(values.notna(), '')
+        if not pd.api.types.is_numeric_dtype(values):
+            text = text.map(_quote_if_needed)
+        columns.append(text.tolist())
+    
+    lines = [header]
+    lines.extend(map(','.join, zip(*columns)))
+    return '\n'.join(lines) + '\n'
+
+
+def build_report_table(features_df: pd.DataFrame, cluster_names: dict = None) -> pd.DataFrame:
+    """
+    Build the tabular report shared by the CSV and Parquet outputs.
     
     Args:
         features_df: DataFrame with user features, clusters, and profiles
-        output_path: Path to save CSV file
         cluster_names: Optional mapping of cluster_id -> name for custom cluster names
+        
+    Returns:
+        Report DataFrame with readable column names, sorted by influence score
     """
     # Select columns for report
     report_columns = [
@@ -26,145 +122,174 @@ def generate_csv_report(features_df: pd.DataFrame, output_path: str = "user_beha
     # Filter to available columns
     available_columns = [col for col in report_columns if col in features_df.columns]
     
-    report_df = features_df[available_columns].copy()
+    report_df = features_df[available_columns]
     
     # Map cluster IDs to names
-    report_df['cluster'] = report_df['cluster'].apply(lambda x: get_cluster_name(x, cluster_names))
-    report_df.rename(columns={'cluster': 'Cluster'}, inplace=True)
+    cluster_name_map = {
+        cluster_id: get_cluster_name(cluster_id, cluster_names)
+        for cluster_id in report_df['cluster'].unique()
+    }
     
     # Round numeric columns
-    if 'messages_per_day' in report_df.columns:
-        report_df['messages_per_day'] = report_df['messages_per_day'].round(2)
-    if 'influence_score' in report_df.columns:
-        report_df['influence_score'] = report_df['influence_score'].round(2)
+    rounded = {col: report_df[col].round(2) for col in ('messages_per_day', 'influence_score')
+               if col in report_df.columns}
+    
+    # assign() returns a new frame, so the projection is never written to
+    report_df = report_df.assign(cluster=report_df['cluster'].map(cluster_name_map), **rounded)
     
     # Rename columns for readability
-    report_df.rename(columns={
+    report_df = report_df.rename(columns={
         'user': 'User',
+        'cluster': 'Cluster',
         'total_messages': 'Total Messages',
         'messages_per_day': 'Messages/Day',
         'influence_score': 'Influence Score',
         'behavior_profile': 'Behavior Profile'
-    }, inplace=True)
+    })
     
     # Sort by influence score (descending)
     if 'Influence Score' in report_df.columns:
         report_df = report_df.sort_values('Influence Score', ascending=False)
     
-    # Save to CSV
-    report_df.to_csv(output_path, index=False)
-    print(f"CSV report saved to: {output_path}")
+    return report_df
 
 
-def generate_pdf_report(features_df: pd.DataFrame, output_path: str = "whatsapp_user_behavior_report.pdf", cluster_names: dict = None) -> None:
+def generate_csv_report(features_df: pd.DataFrame, output_path: Union[str, BinaryIO] = "user_behavior_report.csv", cluster_names: dict = None) -> None:
+    """
+    Generate CSV report with user behavior analysis.
+    
+    Args:
+        features_df: DataFrame with user features, clusters, and profiles
+        output_path: Path to save CSV file, or a binary file-like object (e.g. io.BytesIO)
+        cluster_names: Optional mapping of cluster_id -> name for custom cluster names
+    """
+    _write_csv_report(build_report_table(features_df, cluster_names), output_path)
+
+
+def _write_csv_report(report_df: pd.DataFrame, output_path: Union[str, BinaryIO]) -> None:
+    """Write an already built report table as CSV"""
+    # Save to CSV in one write (through a large buffer for file paths)
+    content = _format_csv(report_df)
+    if isinstance(output_path, str):
+        with open(output_path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+            f.write(content)
+        print(f"CSV report saved to: {output_path}")
+    else:
+        output_path.write(content.encode('utf-8'))
+
+
+def generate_parquet_report(features_df: pd.DataFrame, output_path: Union[str, BinaryIO] = "user_behavior_report.parquet", cluster_names: dict = None) -> None:
+    """
+    Generate Parquet report with the same table as the CSV report.
+    
+    Faster to write and read back, and smaller on disk than CSV - meant for
+    programmatic consumers. Requires pyarrow.
+    
+    Args:
+        features_df: DataFrame with user features, clusters, and profiles
+        output_path: Path to save Parquet file, or a binary file-like object (e.g. io.BytesIO)
+        cluster_names: Optional mapping of cluster_id -> name for custom cluster names
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError(PYARROW_MISSING_MESSAGE)
+    
+    _write_parquet_report(build_report_table(features_df, cluster_names), output_path)
+
+
+def _write_parquet_report(report_df: pd.DataFrame, output_path: Union[str, BinaryIO]) -> None:
+    """Write an already built report table as Parquet"""
+    report_df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
+    if isinstance(output_path, str):
+        print(f"Parquet report saved to: {output_path}")
+
+
+def generate_pdf_report(features_df: pd.DataFrame, output_path: Union[str, BinaryIO] = "whatsapp_user_behavior_report.pdf", cluster_names: dict = None) -> None:
     """
     Generate PDF report with user behavior analysis.
     
     Args:
         features_df: DataFrame with user features, clusters, and profiles
-        output_path: Path to save PDF file
+        output_path: Path to save PDF file, or a binary file-like object (e.g. io.BytesIO)
         cluster_names: Optional mapping of cluster_id -> name for custom cluster names
     """
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER
-        
-    except ImportError:
-        print("reportlab not installed. Installing...")
-        import subprocess
-        subprocess.check_call(["pip", "install", "reportlab"])
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("reportlab is required for the PDF report. Install it with: pip install reportlab")
     
     # Create PDF document
     doc = SimpleDocTemplate(output_path, pagesize=letter)
     story = []
     
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=6,
-        leading=14
-    )
-    
     # Title
-    story.append(Paragraph("WhatsApp User Behavior Analysis Report", title_style))
+    story.append(Paragraph("WhatsApp User Behavior Analysis Report", TITLE_STYLE))
     story.append(Spacer(1, 0.3*inch))
     
     # Process each user
     # Sort by influence score
     sorted_df = features_df.sort_values('influence_score', ascending=False)
     
-    for idx, row in sorted_df.iterrows():
+    # Fill in defaults for optional columns so every row has the same fields
+    missing_columns = {col: default for col, default in PDF_COLUMN_DEFAULTS.items()
+                       if col not in sorted_df.columns}
+    sorted_df = sorted_df.assign(**missing_columns)[['user', 'cluster', *PDF_COLUMN_DEFAULTS]]
+    
+    for row in sorted_df.itertuples(index=False):
         # User header
-        user_name = str(row['user'])
-        cluster_name = get_cluster_name(int(row['cluster']), cluster_names)
+        user_name = str(row.user)
+        cluster_name = get_cluster_name(int(row.cluster), cluster_names)
+        
+        story.append(Paragraph(f"<b>User:</b> {user_name}", HEADING_STYLE))
         
-        story.append(Paragraph(f"<b>User:</b> {user_name}", heading_style))
-        story.append(Paragraph(f"<b>Cluster:</b> {cluster_name}", body_style))
-        story.append(Paragraph(f"<b>Total Messages:</b> {int(row.get('total_messages', 0))}", body_style))
-        story.append(Paragraph(f"<b>Messages/Day:</b> {row.get('messages_per_day', 0):.2f}", body_style))
-        story.append(Paragraph(f"<b>Influence Score:</b> {row.get('influence_score', 0):.2f}", body_style))
+        # Stats go in a single paragraph - one markup parse instead of four
+        story.append(Paragraph(
+            f"<b>Cluster:</b> {cluster_name}<br/>"
+            f"<b>Total Messages:</b> {int(row.total_messages)}<br/>"
+            f"<b>Messages/Day:</b> {row.messages_per_day:.2f}<br/>"
+            f"<b>Influence Score:</b> {row.influence_score:.2f}",
+            BODY_STYLE
+        ))
         story.append(Spacer(1, 0.1*inch))
         
         # Behavior profile
-        profile = row.get('behavior_profile', 'No profile available.')
-        story.append(Paragraph(f"<b>Behavior Profile:</b> {profile}", body_style))
+        profile = row.behavior_profile
+        story.append(Paragraph(f"<b>Behavior Profile:</b> {profile}", BODY_STYLE))
         story.append(Spacer(1, 0.2*inch))
         
         # Add separator line
-        story.append(Paragraph("---", body_style))
+        story.append(Paragraph("---", BODY_STYLE))
         story.append(Spacer(1, 0.2*inch))
     
     # Build PDF
     doc.build(story)
-    print(f"PDF report saved to: {output_path}")
+    if isinstance(output_path, str):
+        print(f"PDF report saved to: {output_path}")
 
 
-def generate_reports(features_df: pd.DataFrame, csv_path: Optional[str] = None, pdf_path: Optional[str] = None, cluster_names: dict = None) -> None:
+def generate_reports(features_df: pd.DataFrame, csv_path: Optional[Union[str, BinaryIO]] = None,
+                     pdf_path: Optional[Union[str, BinaryIO]] = None, cluster_names: dict = None,
+                     parquet_path: Optional[Union[str, BinaryIO]] = None) -> None:
     """
-    Generate both CSV and PDF reports.
+    Generate both CSV and PDF reports, plus a Parquet report if requested.
     
     Args:
         features_df: DataFrame with user features, clusters, and profiles
-        csv_path: Optional path for CSV output (default: user_behavior_report.csv)
-        pdf_path: Optional path for PDF output (default: whatsapp_user_behavior_report.pdf)
+        csv_path: Optional path or binary buffer for CSV output (default: user_behavior_report.csv)
+        pdf_path: Optional path or binary buffer for PDF output (default: whatsapp_user_behavior_report.pdf)
         cluster_names: Optional mapping of cluster_id -> name for custom cluster names
+        parquet_path: Optional path or binary buffer for Parquet output (skipped if None)
     """
+    # Fail before writing anything rather than after the CSV/PDF are out
+    if parquet_path is not None and not PYARROW_AVAILABLE:
+        raise ImportError(PYARROW_MISSING_MESSAGE)
+    
     if csv_path is None:
         csv_path = "user_behavior_report.csv"
     if pdf_path is None:
         pdf_path = "whatsapp_user_behavior_report.pdf"
     
-    generate_csv_report(features_df, csv_path, cluster_names)
+    # CSV and Parquet share one report table
+    report_df = build_report_table(features_df, cluster_names)
+    
+    _write_csv_report(report_df, csv_path)
     generate_pdf_report(features_df, pdf_path, cluster_names)
+    if parquet_path is not None:
+        _write_parquet_report(report_df, parquet_path)